@@ -0,0 +1,53 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Cooper Dalrymple
+#
+# SPDX-License-Identifier: Unlicense
+
+# boot.py:
+# import storage
+# storage.remount("/", readonly=False)
+
+import array
+
+import board
+
+import pio_i2s
+from pio_i2s.adpcm import ADPCMReader, ADPCMWriter
+
+PATH = "/test_adpcm.wav"
+LENGTH = 3000  # ms
+
+properties = {
+    "channel_count": 1,
+    "sample_rate": 22050,
+    "bits_per_sample": 16,  # IMA-ADPCM requires 16-bit signed samples
+    "samples_signed": True,
+    "buffer_size": 4096,
+}
+
+mic = pio_i2s.I2S(
+    bit_clock=board.GP0,  # word select is GP1
+    data_in=board.GP2,
+    **properties,
+)
+
+# Record compressed audio, using a quarter of the storage of 16-bit PCM
+num_buffers = int((LENGTH / 1000.0 * mic.sample_rate * mic.channel_count) // mic.buffer_size)
+with ADPCMWriter(PATH, channel_count=mic.channel_count, sample_rate=mic.sample_rate) as file:
+    for i in range(num_buffers):
+        file.writeframes(mic.read())
+
+mic.deinit()
+
+codec = pio_i2s.I2S(
+    bit_clock=board.GP3,  # word select is GP4
+    data_out=board.GP5,
+    **properties,
+)
+
+# Decode and play back the recording
+data = array.array(codec.buffer_format, [0] * codec.buffer_size)
+with ADPCMReader(PATH) as file:
+    while length := file.readframes(data):
+        codec.write(data[:length])  # blocking
+
+codec.deinit()
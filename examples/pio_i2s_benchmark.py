@@ -0,0 +1,84 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Cooper Dalrymple
+#
+# SPDX-License-Identifier: Unlicense
+
+import array
+import gc
+import time
+
+import board
+
+
+def measure_import(name):
+    gc.collect()
+    mem_free = gc.mem_free()
+    start = time.monotonic_ns()
+    __import__(name)
+    elapsed = (time.monotonic_ns() - start) // 1000
+    gc.collect()
+    return elapsed, mem_free - gc.mem_free()
+
+
+# Measure the cost of importing the core library, which is the baseline that every program pays
+base_time, base_mem = measure_import("pio_i2s")
+print(f"Import pio_i2s: {base_time} us, {base_mem} bytes")
+
+# The optional stages are only loaded when imported, so report what each adds to the baseline
+for name in ("pio_i2s.analysis", "pio_i2s.adpcm", "pio_i2s.profile", "pio_i2s.sync"):
+    elapsed, mem = measure_import(name)
+    print(
+        f"Import {name}: +{elapsed} us ({elapsed * 100 // base_time}%), "
+        f"+{mem} bytes ({mem * 100 // base_mem}%)"
+    )
+
+import pio_i2s  # noqa: E402
+from pio_i2s.adpcm import ADPCMWriter  # noqa: E402
+
+
+def create_bus():
+    gc.collect()
+    mem_free = gc.mem_free()
+    start = time.monotonic_ns()
+    codec = pio_i2s.I2S(
+        bit_clock=board.GP0,  # word select is GP1
+        data_out=board.GP3,
+        channel_count=2,
+        sample_rate=22050,
+        bits_per_sample=16,
+        samples_signed=True,
+        buffer_size=1024,
+    )
+    elapsed = (time.monotonic_ns() - start) // 1000
+    gc.collect()
+    print(f"Create: {elapsed} us, {mem_free - gc.mem_free()} bytes")
+    codec.deinit()
+
+
+# The first bus loads the assembler, the second uses the cached program
+create_bus()
+create_bus()
+
+
+class NullFile:
+    """Discard written data so that only the encoder is measured"""
+
+    def write(self, data):
+        return len(data)
+
+    def seek(self, offset):
+        pass
+
+
+# Measure how long it takes to encode one second of audio with IMA-ADPCM
+SAMPLE_RATE = 22050
+BUFFER_SIZE = 1024
+
+block = array.array("h", [(i * 97) % 4096 - 2048 for i in range(BUFFER_SIZE)])
+writer = ADPCMWriter(NullFile(), channel_count=1, sample_rate=SAMPLE_RATE)
+start = time.monotonic_ns()
+for i in range(SAMPLE_RATE // BUFFER_SIZE):
+    writer.writeframes(block)
+elapsed = (time.monotonic_ns() - start) / 1000000000
+duration = (SAMPLE_RATE // BUFFER_SIZE) * BUFFER_SIZE / SAMPLE_RATE
+writer.close()
+print(f"ADPCM encode: {elapsed / duration * 100:.0f}% of real time at {SAMPLE_RATE} Hz mono")
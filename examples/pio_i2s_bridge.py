@@ -0,0 +1,42 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Cooper Dalrymple
+#
+# SPDX-License-Identifier: Unlicense
+
+import board
+
+import pio_i2s
+from pio_i2s.sync import ClockSync
+
+BUFFER_SIZE = 1024
+
+properties = {
+    "channel_count": 2,
+    "sample_rate": 22050,
+    "bits_per_sample": 16,
+    "samples_signed": True,
+    "buffer_size": BUFFER_SIZE,
+}
+
+# Input clocked by an external device
+input = pio_i2s.I2S(
+    peripheral=True,
+    data_in=board.GP0,
+    bit_clock=board.GP1,
+    word_select=board.GP2,
+    **properties,
+)
+
+# Output clocked by this device
+output = pio_i2s.I2S(
+    bit_clock=board.GP3,  # word select is GP4
+    data_out=board.GP5,
+    **properties,
+)
+
+# Trim the output clock to follow the rate of the external device
+sync = ClockSync(input, output)
+
+while True:
+    output.write(input.read())
+    if sync.update():
+        print(f"Clock ratio: {sync.ratio:.6f}, frame error: {sync.error:.1f}")
@@ -8,9 +8,9 @@ import audiobusio
 import audiocore
 import audiomixer
 import board
-import ulab.numpy as np
 
 import pio_i2s
+from pio_i2s.analysis import Meter
 
 BUFFER_SIZE = 1024
 
@@ -29,6 +29,7 @@ input = pio_i2s.I2S(
     buffer_size=BUFFER_SIZE,
     **properties,
 )
+input.input_meter = Meter(input, decimation=4)
 
 sample_buffer = array.array(input.buffer_format, [0] * BUFFER_SIZE)
 sample = audiocore.RawSample(
@@ -68,6 +69,6 @@ except ImportError:
 while True:
     # Load RawSample buffer with I2S input data
     data = input.read()
-    print(np.max(np.array(data, dtype=np.int16)))
+    print(input.input_meter.peak)
     for i in range(BUFFER_SIZE):
         sample_buffer[i] = data[i]
@@ -0,0 +1,42 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Cooper Dalrymple
+#
+# SPDX-License-Identifier: Unlicense
+
+# boot.py:
+# import storage
+# storage.remount("/", readonly=False)
+
+import adafruit_wave
+import board
+
+import pio_i2s
+from pio_i2s.analysis import Gate
+
+PATH = "/speech.wav"
+LENGTH = 30000  # ms
+
+mic = pio_i2s.I2S(
+    bit_clock=board.GP0,  # word select is GP1
+    data_in=board.GP2,
+    channel_count=1,
+    sample_rate=22050,
+    bits_per_sample=16,
+    samples_signed=True,
+    buffer_size=4096,
+)
+
+# Only pass on blocks where someone is speaking
+gate = Gate(mic, threshold=0.02, hangover=0.5, pre_roll=0.2)
+
+num_frames = int(LENGTH / 1000.0 * mic.sample_rate)
+
+with adafruit_wave.open(PATH, mode="wb") as file:
+    file.setframerate(mic.sample_rate)
+    file.setnchannels(mic.channel_count)
+    file.setsampwidth(mic.bits_per_sample // 8)
+    while gate.frame_offset < num_frames:
+        for offset, data in gate.read():
+            print(f"Active at {offset / mic.sample_rate:.2f}s")
+            file.writeframes(data)
+
+mic.deinit()
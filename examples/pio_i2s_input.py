@@ -3,9 +3,9 @@
 # SPDX-License-Identifier: Unlicense
 
 import board
-import ulab.numpy as np
 
 import pio_i2s
+from pio_i2s.analysis import Biquad, Filter, Meter
 
 codec = pio_i2s.I2S(
     bit_clock=board.GP0,  # word select is GP1
@@ -17,6 +17,18 @@ codec = pio_i2s.I2S(
     buffer_size=1024,
 )
 
+# Remove DC offset and low-frequency rumble from the microphone
+codec.input_filter = Filter(
+    codec,
+    [
+        Biquad.dc_block(codec.sample_rate),
+        Biquad.highpass(codec.sample_rate, 80),
+    ],
+)
+
+# Measure the level of each block as it is read
+codec.input_meter = Meter(codec, decimation=4)
+
 while True:
-    if data := codec.read():
-        print(np.max(np.array(data, dtype=np.int16)))
+    if codec.read():
+        print(codec.input_meter.peak)
@@ -34,5 +34,5 @@ for i in range(LENGTH):
     for j in range(CHANNEL_COUNT):
         sine_wave[i * CHANNEL_COUNT + j] = value
 
-# Write sine wave continuously
-codec.write(sine_wave, loop=True)
+# Play sine wave continuously directly from memory
+codec.play_loop(sine_wave)
@@ -3,9 +3,9 @@
 # SPDX-License-Identifier: Unlicense
 
 import board
-import ulab.numpy as np
 
 import pio_i2s
+from pio_i2s.analysis import Meter
 
 codec = pio_i2s.I2S(
     bit_clock=board.GP1,
@@ -19,6 +19,9 @@ codec = pio_i2s.I2S(
     peripheral=True,
 )
 
+# Measure the level of each block as it is read
+codec.input_meter = Meter(codec, decimation=4)
+
 while True:
-    if data := codec.read():
-        print(np.max(np.array(data, dtype=np.int16)))
+    if codec.read():
+        print(codec.input_meter.peak)
@@ -0,0 +1,32 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Cooper Dalrymple
+#
+# SPDX-License-Identifier: Unlicense
+
+import time
+
+import board
+
+import pio_i2s
+from pio_i2s.profile import Profiler
+
+codec = pio_i2s.I2S(
+    bit_clock=board.GP0,  # word select is GP1
+    data_out=board.GP3,
+    data_in=board.GP4,
+    channel_count=1,
+    sample_rate=22050,
+    bits_per_sample=16,
+    samples_signed=True,
+    buffer_size=1024,
+)
+
+codec.profiler = Profiler()
+
+# Pass input through to output and dump timing statistics every 5 seconds
+last_dump = time.monotonic()
+while True:
+    codec.write(codec.read())
+    if time.monotonic() - last_dump >= 5:
+        codec.profiler.dump()
+        codec.profiler.reset()
+        last_dump = time.monotonic()
@@ -0,0 +1,26 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Cooper Dalrymple
+#
+# SPDX-License-Identifier: Unlicense
+
+import board
+import ulab.numpy as np
+
+import pio_i2s
+from pio_i2s.analysis import Spectrum
+
+mic = pio_i2s.I2S(
+    bit_clock=board.GP0,  # word select is GP1
+    data_in=board.GP2,
+    channel_count=1,
+    sample_rate=22050,
+    bits_per_sample=16,
+    samples_signed=True,
+    buffer_size=1024,
+)
+
+spectrum = Spectrum(mic, fft_size=256, frame_rate=10)
+
+while True:
+    if spectrum.process(mic.read()):  # blocking
+        bins = spectrum.bins[0]
+        print(f"Peak frequency: {np.argmax(bins) * spectrum.resolution:.0f} Hz")
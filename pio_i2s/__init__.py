@@ -0,0 +1,1016 @@
+# SPDX-FileCopyrightText: 2017 Scott Shawcroft, written for Adafruit Industries
+# SPDX-FileCopyrightText: Copyright (c) 2024 Cooper Dalrymple
+#
+# SPDX-License-Identifier: MIT
+"""
+`pio_i2s`
+================================================================================
+
+Bidirectional I2S audio communication using PIO.
+
+* Author(s): Cooper Dalrymple
+
+Implementation Notes
+--------------------
+
+**Software and Dependencies:**
+
+* Adafruit CircuitPython firmware for the supported boards (requires version 9.2.1+):
+  https://circuitpython.org/downloads
+
+* Adafruit's PIOASM library: https://github.com/adafruit/Adafruit_CircuitPython_PIOASM
+
+* ulab (optional, built into most CircuitPython firmware) for faster analysis:
+  https://github.com/v923z/micropython-ulab
+
+The optional processing stages are kept in separate modules so that they are only loaded when
+imported: :mod:`pio_i2s.analysis`, :mod:`pio_i2s.adpcm`, :mod:`pio_i2s.profile` and
+:mod:`pio_i2s.sync`.
+"""
+
+# imports
+
+from __future__ import annotations
+
+__version__ = "0.0.0+auto.0"
+__repo__ = "https://github.com/relic-se/CircuitPython_PIO_I2S.git"
+
+import array
+import time
+
+import microcontroller
+import rp2pio
+
+# Only imported by type checkers, annotations are not evaluated at runtime
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import circuitpython_typing
+
+    from pio_i2s.analysis import Filter, Meter
+    from pio_i2s.profile import Profiler
+
+_programs = {}
+
+
+def _assemble(pioasm: str) -> array.array:
+    # Assembled programs are cached and the assembler is only loaded when first needed
+    if (program := _programs.get(pioasm)) is None:
+        import adafruit_pioasm  # noqa: PLC0415
+
+        program = _programs[pioasm] = adafruit_pioasm.assemble(pioasm)
+    return program
+
+
+def _get_gpio_index(pin: microcontroller.Pin) -> int:
+    for name in dir(microcontroller.pin):
+        if getattr(microcontroller.pin, name) is pin:
+            return int(name.replace("GPIO", ""))
+    return None
+
+
+class I2S:
+    """Communicate with external audio devices using I2S protocol.
+
+    :param bit_clock: The bit clock (or serial clock) pin.
+    :type bit_clock: :class:`microcontroller.Pin`
+    :param word_select: The word select (or left/right clock) pin. Must be the next pin from
+        bit_clock sequentially. If not specified, the next pin sequentially from bit_clock will be
+        used automatically.
+    :type word_select: :class:`microcontroller.Pin`
+    :param data_out: The output data pin. If left unspecified, write functionality will be disabled.
+    :type data_out: :class:`microcontroller.Pin`, optional
+    :param data_in: The input data pin. If left unspecified, read functionality will be disabled.
+    :type data_in: :class:`microcontroller.Pin`, optional
+    :param channel_count: The number of channels. 1 = mono; 2 = stereo.
+    :type channel_count: `int`, optional
+    :param sample_rate: The sample rate to be used.
+    :type sample_rate: `int`, optional
+    :param bits_per_sample: The bits per sample of be used. Must be 8, 16, 24, or 32 bits.
+    :type bits_per_sample: `int`, optional
+    :param samples_signed: Whether the samples are signed (True) or unsigned (False).
+    :type samples_signed: `bool`, optional
+    :param buffer_size: The total size in bytes of each of the two playback and record buffers to
+        use.
+    :type buffer_size: `int`, optional
+    :param left_justified: True when data bits are aligned with the word select clock. False when
+        they are shifted by one to match classic I2S protocol.
+    :type left_justified: `bool`, optional
+    :param peripheral: Whether the clock signals are generated by this device (False) or are read
+        from the output of an external device (True). data_in must be specified if using peripheral
+        mode and come before bit_clock sequentially.
+    :type peripheral: `bool`, optional
+    :param rate_window: The duration in seconds over which buffer swaps are counted to estimate the
+        actual sample rate of the bus. See :attr:`measured_sample_rate`.
+    :type rate_window: `float`, optional
+    """
+
+    def __init__(  # noqa: PLR0912, PLR0913, PLR0915
+        self,
+        bit_clock: microcontroller.Pin,
+        word_select: microcontroller.Pin = None,
+        data_out: microcontroller.Pin = None,
+        data_in: microcontroller.Pin = None,
+        channel_count: int = 2,
+        sample_rate: int = 48000,
+        bits_per_sample: int = 16,
+        samples_signed: bool = True,
+        buffer_size: int = 1024,
+        left_justified: bool = False,
+        peripheral: bool = False,
+        rate_window: float = 1.0,
+    ):
+        if word_select and not rp2pio.pins_are_sequential([bit_clock, word_select]):
+            raise ValueError("Word select pin must be sequential to bit clock pin")
+
+        if peripheral and not data_in:
+            raise ValueError("Data input pin must be specified in peripheral mode")
+
+        if peripheral and not rp2pio.pins_are_sequential([data_in, bit_clock]):
+            raise ValueError("Data input pin must come before bit clock pin sequentially")
+
+        if channel_count < 1 or channel_count > 2:
+            raise ValueError("Invalid channel count")
+
+        if bits_per_sample % 8 != 0 or bits_per_sample < 8 or bits_per_sample > 32:
+            raise ValueError("Invalid bits per sample")
+
+        if buffer_size < 1:
+            raise ValueError("Buffer size must be greater than 0")
+
+        if rate_window <= 0:
+            raise ValueError("Rate window must be greater than 0")
+
+        self._channel_count = channel_count
+        self._sample_rate = sample_rate
+        self._bits_per_sample = bits_per_sample
+        self._samples_signed = samples_signed
+        self._buffer_size = buffer_size
+        self._peripheral = peripheral
+
+        # Sample rate estimation from buffer swap times
+        self._rate_window = int(rate_window * 1000000000)
+        self._rate_start = None
+        self._rate_count = 0
+        self._swap_time = None
+        self._swap_index = None
+        self._poll_time = None
+        self._measured_sample_rate = float(sample_rate)
+        self._frame_count = 0
+
+        self._input_meter = None
+        self._output_meter = None
+        self._input_filter = None
+        self._output_filter = None
+        self._loop_buffer = None
+
+        self._paused = False
+        self._idle_timeout = None
+        self._idle_hold = False
+        self._last_activity = 0
+
+        self._profiler = None
+        self._profile_last = None
+        self._profile_return = None
+        self._profile_wait = 0
+
+        self._writable = bool(data_out)
+        self._readable = bool(data_in)
+
+        left_channel_out = "out pins 1" if self._writable else "nop"
+        right_channel_out = "out pins 1" if self._writable and channel_count > 1 else "nop"
+
+        left_channel_in = "in pins 1" if self._readable else "nop"
+        right_channel_in = "in pins 1" if self._readable and channel_count > 1 else "nop"
+
+        if not peripheral:
+            pioasm = f"""
+.program i2s_controller
+.side_set 2
+    nop                         side 0b{1 if left_justified else 0}1
+    set x {bits_per_sample-2}   side 0b{1 if left_justified else 0}1
+left_bit:
+    {left_channel_out}          side 0b00 [1]
+    {left_channel_in}           side 0b01
+    jmp x-- left_bit            side 0b01
+    {left_channel_out}          side 0b{0 if left_justified else 1}0 [1]
+    {left_channel_in}           side 0b{0 if left_justified else 1}1
+    set x {bits_per_sample-2}   side 0b{0 if left_justified else 1}1
+right_bit:
+    {right_channel_out}         side 0b10 [1]
+    {right_channel_in}          side 0b11
+    jmp x-- right_bit           side 0b11
+    {right_channel_out}         side 0b{1 if left_justified else 0}0 [1]
+    {right_channel_in}          side 0b{1 if left_justified else 0}1
+"""
+        else:
+            bit_clock_gpio = _get_gpio_index(bit_clock)
+            word_select_gpio = _get_gpio_index(word_select) if word_select else bit_clock_gpio + 1
+            if not left_justified:
+                pioasm = f"""
+.program i2s_peripheral
+.side_set 2
+    wait 1 gpio {word_select_gpio}
+    wait 1 gpio {bit_clock_gpio}
+    wait 0 gpio {word_select_gpio}
+    wait 0 gpio {bit_clock_gpio}
+    set x {bits_per_sample-2}
+    wait 1 gpio {bit_clock_gpio}
+left_bit:
+    wait 0 gpio {bit_clock_gpio}
+    {left_channel_out}
+    wait 1 gpio {bit_clock_gpio}
+    {left_channel_in}
+    jmp x-- left_bit
+    wait 1 gpio {word_select_gpio}
+    wait 0 gpio {bit_clock_gpio}
+    {left_channel_out}
+    wait 1 gpio {bit_clock_gpio}
+    {left_channel_in}
+    set x {bits_per_sample-2}
+right_bit:
+    wait 0 gpio {bit_clock_gpio}
+    {right_channel_out}
+    wait 1 gpio {bit_clock_gpio}
+    {right_channel_in}
+    jmp x-- right_bit
+    wait 0 gpio {word_select_gpio}
+    wait 0 gpio {bit_clock_gpio}
+    {right_channel_out}
+    wait 1 gpio {bit_clock_gpio}
+    {right_channel_in}
+"""
+            else:
+                pioasm = f"""
+.program i2s_peripheral_left_justified
+.side_set 2
+    wait 1 gpio {word_select_gpio}
+    wait 1 gpio {bit_clock_gpio}
+    set x {bits_per_sample-1}
+    wait 0 gpio {word_select_gpio}
+left_bit:
+    wait 0 gpio {bit_clock_gpio}
+    {left_channel_out}
+    wait 1 gpio {bit_clock_gpio}
+    {left_channel_in}
+    jmp x-- left_bit
+    set x {bits_per_sample-1}
+    wait 1 gpio {word_select_gpio}
+right_bit:
+    wait 0 gpio {bit_clock_gpio}
+    {right_channel_out}
+    wait 1 gpio {bit_clock_gpio}
+    {right_channel_in}
+    jmp x-- right_bit
+"""
+
+        self._pio = rp2pio.StateMachine(
+            program=_assemble(pioasm),
+            wrap_target=1 if not peripheral else (4 if not left_justified else 2),
+            frequency=self._get_frequency(sample_rate),
+            first_out_pin=data_out,
+            out_pin_count=1,
+            first_in_pin=data_in,
+            in_pin_count=1 if not peripheral else 3,
+            first_sideset_pin=bit_clock if not peripheral else None,
+            sideset_pin_count=2 if not peripheral else 1,
+            auto_pull=True,
+            pull_threshold=bits_per_sample,
+            out_shift_right=False,
+            auto_push=True,
+            push_threshold=bits_per_sample,
+            in_shift_right=False,
+        )
+
+        # Begin double-buffered background read/write operations
+
+        self._buffer_format = (
+            "b" if bits_per_sample == 8 else ("h" if bits_per_sample == 16 else "l")
+        )
+        if not samples_signed:
+            self._buffer_format = self._buffer_format.upper()
+
+        self._silence = 0 if samples_signed else 2 ** (bits_per_sample - 1)
+        self._sample_max = self._silence + 2 ** (bits_per_sample - 1) - 1
+        self._sample_min = self._silence - 2 ** (bits_per_sample - 1)
+
+        # Output gain as 16.16 fixed-point
+        self._gain = 1 << 16
+        self._gain_target = 1 << 16
+        self._mute = False
+
+        if self._writable:
+            self._buffer_out = [
+                array.array(
+                    self._buffer_format,
+                    [self._silence] * buffer_size,
+                )
+                for i in range(2)
+            ]  # double-buffered
+            self._pio.background_write(
+                loop=self._buffer_out[0],
+                loop2=self._buffer_out[1],
+            )
+            self._write_index = 0
+            self._last_write_index = -1
+
+        if self._readable:
+            self._buffer_in = [
+                array.array(self._buffer_format, [self._silence] * buffer_size) for i in range(2)
+            ]  # double-buffered
+            self._pio.background_read(
+                loop=self._buffer_in[0],
+                loop2=self._buffer_in[1],
+            )
+
+        self._reset_swaps()
+
+    def deinit(self) -> None:
+        """Stop I2S communication and de-initialize resources used by this object."""
+        self._pio.stop()
+        self._pio.deinit()
+        del self._pio
+
+        if hasattr(self, "_buffer_out"):
+            del self._buffer_out
+
+        if hasattr(self, "_buffer_in"):
+            del self._buffer_in
+
+    @property
+    def channel_count(self) -> int:
+        """The number of channels used by the I2S bus. 1 for mono, 2 for stereo. This property is
+        read-only.
+        """
+        return self._channel_count
+
+    @property
+    def sample_rate(self) -> int:
+        """The rate of the I2S bus in samples per second. This property is read-only."""
+        return self._sample_rate
+
+    @property
+    def bits_per_sample(self) -> int:
+        """The number of bits per sample. This property is read-only."""
+        return self._bits_per_sample
+
+    @property
+    def samples_signed(self) -> bool:
+        """Whether or not the samples are signed (True) or unsigned (False) integers. This property
+        is read-only.
+        """
+        return self._samples_signed
+
+    @property
+    def silence(self) -> int:
+        """The sample value which represents silence, 0 for signed samples or the midpoint of the
+        range for unsigned samples. This property is read-only.
+        """
+        return self._silence
+
+    @property
+    def sample_max(self) -> int:
+        """The largest sample value which can be represented. This property is read-only."""
+        return self._sample_max
+
+    @property
+    def sample_min(self) -> int:
+        """The smallest sample value which can be represented. This property is read-only."""
+        return self._sample_min
+
+    @property
+    def buffer_size(self) -> int:
+        """The number of samples per buffer. This property is read-only."""
+        return self._buffer_size
+
+    @property
+    def buffer_format(self) -> str:
+        """The format code of the :class:`array.array` buffers. For more information, refer to the
+        original CPython documentation:
+        `array <https://docs.python.org/3/library/array.html#module-array>`_. This property is
+        read-only.
+        """
+        return self._buffer_format
+
+    @property
+    def peripheral(self) -> bool:
+        """Whether the clock signals are generated by an external device (True) or by this device
+        (False). This property is read-only.
+        """
+        return self._peripheral
+
+    def _get_frequency(self, sample_rate: float) -> int:
+        return round(sample_rate * self._bits_per_sample * 2 * (4 if not self._peripheral else 16))
+
+    @property
+    def frequency(self) -> int:
+        """The actual frequency of the state machine in Hz. When acting as the controller, this
+        can be fine-tuned to trim the rate of the bus by small amounts without interrupting
+        playback or recording. Note that the state machine clock divider has limited resolution,
+        so the resulting frequency may differ slightly from the requested value. Cannot be changed
+        in peripheral mode.
+        """
+        return self._pio.frequency
+
+    @frequency.setter
+    def frequency(self, value: int) -> None:
+        if self._peripheral:
+            raise RuntimeError("Frequency cannot be changed in peripheral mode")
+        self._pio.frequency = int(value)
+
+    @property
+    def nominal_frequency(self) -> int:
+        """The state machine frequency in Hz which corresponds with :attr:`sample_rate`. This
+        property is read-only.
+        """
+        return self._get_frequency(self._sample_rate)
+
+    @property
+    def measured_sample_rate(self) -> float:
+        """The sample rate of the bus in frames per second as measured against the local clock
+        by timing buffer swaps. This is most useful in peripheral mode where the rate is set by an
+        external device and will drift from :attr:`sample_rate`. The estimate is updated once per
+        rate window. Swaps are observed by :meth:`read` (or by :meth:`write` on output-only buses),
+        and any buffers which completed in between are still counted, so the estimate does not
+        depend on every buffer being consumed. This property is read-only.
+        """
+        return self._measured_sample_rate
+
+    @property
+    def frame_count(self) -> int:
+        """The total number of frames transferred by the bus up to the last observed buffer swap,
+        including buffers which completed without being observed. This property is read-only.
+        """
+        return self._frame_count
+
+    @property
+    def frame_phase(self) -> float:
+        """The number of frames transferred since the last observed buffer swap, estimated from
+        the local clock. Added to :attr:`frame_count`, this gives the position of the bus at better
+        than one buffer of resolution. This property is read-only.
+        """
+        if self._swap_time is None:
+            return 0.0
+        return (time.monotonic_ns() - self._swap_time) * self._get_swap_rate() / 1000000000
+
+    def _get_swap_rate(self) -> float:
+        # In controller mode the rate follows exactly from the frequency of the state machine
+        if self._peripheral:
+            return self._measured_sample_rate
+        return self._sample_rate * self._pio.frequency / self.nominal_frequency
+
+    def _reset_swaps(self) -> None:
+        # In controller mode the buffers complete at known times from the start of the transfer,
+        # but in peripheral mode the external clock may not be running yet
+        self._swap_time = None if self._peripheral else time.monotonic_ns()
+        self._swap_index = 1
+        self._poll_time = self._rate_start = self._swap_time
+        self._rate_count = 0
+
+    def _mark_swap(self, index: int, waited: bool = False) -> None:
+        now = time.monotonic_ns()
+        frames = self._buffer_size // self._channel_count
+        if self._swap_time is None:
+            count = 1
+            self._swap_time = self._rate_start = now
+        else:
+            # Only the most recently completed buffer is reported, so any which completed unseen
+            # are inferred from the elapsed time. The buffers alternate, so the index decides
+            # whether an odd or even number completed and timing jitter cannot miscount.
+            period = frames * 1000000000 / self._get_swap_rate()
+            parity = (index - self._swap_index) % 2
+            count = round(((now - self._swap_time) / period - parity) / 2) * 2 + parity
+            count = max(count, 2 - parity)
+            # The swap happened after the last poll which found nothing and before this one. The
+            # predicted time is kept within those bounds, which are exact after a blocking wait.
+            predicted = self._swap_time + int(count * period)
+            self._swap_time = min(max(predicted, now if waited else self._poll_time), now)
+            self._rate_count += count * frames
+        self._swap_index = index
+        self._poll_time = now
+        self._frame_count += count * frames
+        elapsed = self._swap_time - self._rate_start
+        if elapsed >= self._rate_window:
+            rate = self._rate_count * 1000000000 / elapsed
+            # Smooth out jitter in the time that the swaps were observed
+            self._measured_sample_rate += (rate - self._measured_sample_rate) * 0.25
+            self._rate_start = self._swap_time
+            self._rate_count = 0
+
+    def _get_write_index(self, waited: bool = False) -> int:
+        if not self._writable:
+            return None
+        last_write = self._pio.last_write
+        if not last_write:
+            if not waited and not self._readable:
+                self._poll_time = time.monotonic_ns()
+            return self._write_index
+        for i in range(2):
+            if last_write is self._buffer_out[i]:
+                if not self._readable:
+                    self._mark_swap(i, waited)
+                self._write_index = i
+                break
+        return self._write_index
+
+    @property
+    def input_meter(self) -> Meter:
+        """A :class:`~pio_i2s.analysis.Meter` object which measures every block of input data
+        returned by :meth:`read`, or None to disable input metering.
+        """
+        return self._input_meter
+
+    @input_meter.setter
+    def input_meter(self, value: Meter) -> None:
+        self._input_meter = value
+
+    @property
+    def output_meter(self) -> Meter:
+        """A :class:`~pio_i2s.analysis.Meter` object which measures every block of output data after
+        it has been written to the output buffer, or None to disable output metering.
+        """
+        return self._output_meter
+
+    @output_meter.setter
+    def output_meter(self, value: Meter) -> None:
+        self._output_meter = value
+
+    @property
+    def input_filter(self) -> Filter:
+        """A :class:`~pio_i2s.analysis.Filter` object which is applied in place to every block of
+        input data returned by :meth:`read` before it is measured by :attr:`input_meter`, or None to
+        disable input filtering.
+        """
+        return self._input_filter
+
+    @input_filter.setter
+    def input_filter(self, value: Filter) -> None:
+        self._input_filter = value
+
+    @property
+    def output_filter(self) -> Filter:
+        """A :class:`~pio_i2s.analysis.Filter` object which is applied in place to every output
+        buffer after data has been written to it, or None to disable output filtering.
+        """
+        return self._output_filter
+
+    @output_filter.setter
+    def output_filter(self, value: Filter) -> None:
+        self._output_filter = value
+
+    @property
+    def profiler(self) -> Profiler:
+        """A :class:`~pio_i2s.profile.Profiler` object which records the timing of the read and
+        write paths, or None to disable profiling. When disabled, no timing measurements are made.
+        The following histograms are recorded:
+
+        * ``set_write_buffer``: Time spent copying data into the output buffer in microseconds.
+        * ``write_wait``: Time spent waiting for :attr:`write_ready` in microseconds.
+        * ``read_wait``: Time spent waiting for input data in :meth:`read` in microseconds.
+        * ``record_copy``: Time spent copying each block in :meth:`record` in microseconds.
+        * ``process``: Time spent outside of :meth:`read` and :meth:`write` between calls in
+          microseconds, typically the processing done by user code.
+        * ``block_budget``: Time spent on each block excluding waits as a percentage of the block
+          period (:attr:`buffer_size` frames at :attr:`sample_rate`). Values of 100 or more mean
+          that the deadline was missed.
+        """
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, value: Profiler) -> None:
+        self._profiler = value
+        self._profile_last = None
+        self._profile_return = None
+        self._profile_wait = 0
+
+    def _profile_enter(self) -> None:
+        if self._profile_return is not None:
+            self._profiler.add_time("process", self._profile_return)
+
+    def _profile_exit(self, complete: bool) -> None:
+        now = time.monotonic_ns()
+        if complete:
+            if self._profile_last is not None:
+                frames = self._buffer_size // self._channel_count
+                period = frames * 1000000000 // self._sample_rate
+                self._profiler.add(
+                    "block_budget",
+                    (now - self._profile_last - self._profile_wait) * 100 // period,
+                    bin_width=10,
+                )
+            self._profile_last = now
+            self._profile_wait = 0
+        self._profile_return = now
+
+    @property
+    def gain(self) -> float:
+        """The gain applied to output data as it is copied into the output buffer. 1.0 leaves the
+        data unchanged. Values greater than 1.0 will amplify the data, saturating at the limits of
+        :attr:`bits_per_sample`. When changed, the gain is ramped linearly across the next block
+        written to avoid clicks, except when looping data where the new gain is applied
+        immediately. Data which has already been written is not affected.
+        """
+        return self._gain_target / 65536
+
+    @gain.setter
+    def gain(self, value: float) -> None:
+        if value < 0:
+            raise ValueError("Gain must not be negative")
+        self._gain_target = round(value * 65536)
+
+    @property
+    def mute(self) -> bool:
+        """Whether or not the output is muted. Muting and unmuting are ramped in the same way as
+        :attr:`gain`.
+        """
+        return self._mute
+
+    @mute.setter
+    def mute(self, value: bool) -> None:
+        self._mute = value
+
+    def _copy_write_buffer(
+        self, data: circuitpython_typing.ReadableBuffer, idx: int, ramp: bool = True
+    ) -> None:
+        buffer = self._buffer_out[idx]
+        length = min(len(data), self._buffer_size)
+        target = 0 if self._mute else self._gain_target
+        gain = self._gain if ramp else target
+        if gain == target == 1 << 16:
+            for j in range(length):
+                buffer[j] = data[j]
+        elif gain == target == 0:
+            for j in range(length):
+                buffer[j] = self._silence
+        else:
+            # Interpolated from the start of the ramp so that rounding does not accumulate and the
+            # next block begins exactly where this one ends
+            start, change = gain, target - gain
+            silence, high, low = self._silence, self._sample_max, self._sample_min
+            for j in range(length):
+                value = (((data[j] - silence) * gain) >> 16) + silence
+                if value > high:
+                    value = high
+                elif value < low:
+                    value = low
+                buffer[j] = value
+                gain = start + change * (j + 1) // length
+        self._gain = target
+
+    def _fill_write_buffer(
+        self, data: circuitpython_typing.ReadableBuffer, idx: int, ramp: bool = True
+    ) -> None:
+        self._copy_write_buffer(data, idx, ramp)
+        if len(data) < self._buffer_size:
+            for j in range(len(data), self._buffer_size):
+                self._buffer_out[idx][j] = self._silence
+        if self._output_filter:
+            self._output_filter.process(self._buffer_out[idx])
+        if self._output_meter:
+            self._output_meter.process(self._buffer_out[idx])
+        self._last_write_index = idx
+
+    def _repeat_write_buffer(self, idx: int) -> None:
+        # Both halves of a loop must be identical, filtering the data again would change it
+        source = self._buffer_out[self._last_write_index]
+        buffer = self._buffer_out[idx]
+        for j in range(self._buffer_size):
+            buffer[j] = source[j]
+        self._last_write_index = idx
+
+    def _set_write_buffer(
+        self, data: circuitpython_typing.ReadableBuffer, double: bool = False, loop: bool = False
+    ) -> None:
+        if self._writable:
+            if self._profiler:
+                start = time.monotonic_ns()
+            idx = self._get_write_index()
+            # Looped data is repeated, so a gain ramp would be heard on every repetition
+            self._fill_write_buffer(data, idx, not (double or loop))
+            if double:
+                self._repeat_write_buffer((idx + 1) % 2)
+            if self._profiler:
+                self._profiler.add_time("set_write_buffer", start)
+
+    @property
+    def write_ready(self) -> bool:
+        """Whether or not the I2S bus has a buffer that is ready to be written to. Always True while
+        :attr:`paused`, as the next write will resume the bus. This property is read-only.
+        """
+        if not self._writable:
+            return False
+        return self._paused or self._get_write_index() != self._last_write_index
+
+    @property
+    def idle_timeout(self) -> float:
+        """The duration in seconds without any calls to :meth:`write` after which the bus is
+        automatically paused using :meth:`pause`, or None to disable. If :attr:`output_meter` is
+        set, writes of pure silence are also counted as idle time. The timeout is only checked
+        when :meth:`update` is called, so it should be called regularly. The bus is not
+        paused while looping data with :meth:`play_loop` or ``write(data, loop=True)``, or if it is
+        readable. The next call to :meth:`write` resumes the bus and its data is played first.
+        """
+        return self._idle_timeout / 1000000000 if self._idle_timeout is not None else None
+
+    @idle_timeout.setter
+    def idle_timeout(self, value: float) -> None:
+        if value is not None and value <= 0:
+            raise ValueError("Idle timeout must be greater than 0")
+        self._idle_timeout = int(value * 1000000000) if value is not None else None
+        self._last_activity = time.monotonic_ns()
+
+    def update(self) -> bool:
+        """Check whether :attr:`idle_timeout` has elapsed and pause the bus if so. This should be
+        called regularly from the main loop while an idle timeout is set.
+
+        :return: Whether or not the bus was paused by this call.
+        """
+        if (
+            self._idle_timeout is None
+            or self._paused
+            or self._readable
+            or self._idle_hold
+            or self._loop_buffer is not None
+            or time.monotonic_ns() - self._last_activity < self._idle_timeout
+        ):
+            return False
+        self.pause()
+        return True
+
+    @property
+    def paused(self) -> bool:
+        """Whether or not the bus has been paused by :meth:`pause` or :attr:`idle_timeout`. This
+        property is read-only.
+        """
+        return self._paused
+
+    def pause(self) -> None:
+        """Stop the state machine and all background transfers to save power and DMA bandwidth
+        while the bus is not in use. The clock signals are held at their current level. The bus
+        can be started again with :meth:`resume`, and is resumed automatically by :meth:`write`
+        and :meth:`read`.
+
+        Output is stopped only once the samples already queued in the state machine have played,
+        which takes at most a few frames, so that no stale samples are played when the bus is
+        resumed and the channels stay in order. Resuming restarts the state machine from the left
+        channel of the first output buffer, which holds any data passed to :meth:`write`.
+        """
+        if self._paused:
+            return
+        if self._writable:
+            self._pio.stop_background_write()
+            # Wait for the FIFO to run empty, limited in case the external clock has stopped
+            self._pio.clear_txstall()
+            deadline = time.monotonic_ns() + 16 * 1000000000 // self._sample_rate
+            while not self._pio.txstall and time.monotonic_ns() < deadline:
+                pass
+        self._pio.stop()
+        if self._readable:
+            self._pio.stop_background_read()
+        self._paused = True
+
+    def resume(self) -> None:
+        """Restart a bus which has been paused. Output begins with silence, or with the buffer
+        provided to :meth:`play_loop` if one was playing when the bus was paused.
+        """
+        if self._paused:
+            self._resume()
+
+    def _resume(self, data: circuitpython_typing.ReadableBuffer = None, loop: bool = False) -> None:
+        self._pio.restart()
+        if self._writable:
+            if self._loop_buffer is not None and not data:
+                self._pio.background_write(loop=self._loop_buffer)
+            else:
+                self._resume_buffers(data, loop)
+        if self._readable:
+            self._pio.background_read(loop=self._buffer_in[0], loop2=self._buffer_in[1])
+        self._paused = False
+        self._last_activity = time.monotonic_ns()
+        self._reset_swaps()
+        self._profile_last = None
+
+    def write(
+        self, data: circuitpython_typing.ReadableBuffer, loop: bool = False, block: bool = True
+    ) -> bool:
+        """Write an array-like set of audio samples to the output buffer up to the maximum
+        :attr:`buffer_size`.
+
+        :param data: The array of sample data.
+        :type data: :class:`circuitpython_typing.ReadableBuffer`
+        :param loop: Whether or not to loop the sample data by copying it to both output buffers.
+        :type loop: `bool`, optional
+        :param block: Whether or not to wait until the I2S bus is ready to be written to.
+        :type block: `bool`, optional
+        :return: Whether or not the output buffer was successfully written to.
+        """
+        if not self._writable or not data:
+            return False
+        profiler = self._profiler
+        if profiler:
+            self._profile_enter()
+        if not (self._resume_write(data, loop) or self._write_buffers(data, loop, block)):
+            if profiler:
+                self._profile_exit(False)
+            return False
+        if self._idle_timeout is not None:
+            self._idle_hold = loop
+            if not self._output_meter or max(self._output_meter.peak):
+                self._last_activity = time.monotonic_ns()
+        if profiler:
+            self._profile_exit(not self._readable)
+        return True
+
+    def _resume_write(self, data: circuitpython_typing.ReadableBuffer, loop: bool) -> bool:
+        if self._paused:
+            self._resume(data, loop)
+        elif self._loop_buffer is not None:
+            self._resume_buffers(data, loop)
+        else:
+            return False
+        return True
+
+    def _write_buffers(
+        self, data: circuitpython_typing.ReadableBuffer, loop: bool, block: bool
+    ) -> bool:
+        if not block:
+            if loop:
+                self._set_write_buffer(data, True)
+            elif self._get_write_index() != self._last_write_index:
+                self._set_write_buffer(data)
+            else:
+                return False
+            return True
+        profiler = self._profiler
+        for i in range(2 if loop else 1):
+            if profiler:
+                start = time.monotonic_ns()
+            waited = False
+            while self._get_write_index(waited) == self._last_write_index:
+                waited = True
+            if profiler:
+                self._profile_wait += profiler.add_time("write_wait", start)
+            if i:
+                self._repeat_write_buffer(self._write_index)
+            else:
+                self._set_write_buffer(data, loop=loop)
+        return True
+
+    def _resume_buffers(
+        self, data: circuitpython_typing.ReadableBuffer = None, loop: bool = False
+    ) -> None:
+        # Prepare both output buffers to be played in order from the first. The buffers are
+        # addressed directly since the index from last_write no longer reflects playback.
+        _ = self._pio.last_write  # Discard any output buffer which has already finished
+        if data:
+            self._fill_write_buffer(data, 0, not loop)
+        if data and loop:
+            self._repeat_write_buffer(1)
+        else:
+            for idx in range(1 if data else 0, 2):
+                for j in range(self._buffer_size):
+                    self._buffer_out[idx][j] = self._silence
+        self._pio.background_write(loop=self._buffer_out[0], loop2=self._buffer_out[1])
+        self._loop_buffer = None
+        if not self._readable:
+            self._reset_swaps()
+        if data and not loop:
+            # The second buffer is queued behind the first and can be written immediately
+            self._write_index, self._last_write_index = 1, 0
+        else:
+            self._write_index, self._last_write_index = 0, 1 if data else -1
+
+    @property
+    def looping(self) -> bool:
+        """Whether or not a buffer provided to :meth:`play_loop` is currently being played. This
+        property is read-only.
+        """
+        return self._loop_buffer is not None
+
+    def play_loop(self, buffer: circuitpython_typing.ReadableBuffer) -> bool:
+        """Repeatedly play a buffer of any length directly from memory without copying it into the
+        output buffers, so that no processing is required while it plays. If a loop or the output
+        buffers are already playing, the new buffer will begin once the current one has finished,
+        allowing loops to be changed seamlessly.
+
+        The buffer must use the format of :attr:`buffer_format`, contain a whole number of frames
+        so that the channels do not swap on each repetition and must not be modified while it is
+        playing. :attr:`gain`, :attr:`output_filter` and :attr:`output_meter` are not applied.
+        Call :meth:`stop_loop` or :meth:`write` to resume playing the output buffers.
+
+        :param buffer: The array of sample data to loop.
+        :type buffer: :class:`circuitpython_typing.ReadableBuffer`
+        :return: Whether or not the loop was started.
+        """
+        if not self._writable or not buffer:
+            return False
+        if getattr(buffer, "typecode", self._buffer_format) != self._buffer_format:
+            raise ValueError("Buffer format does not match")
+        if len(buffer) % self._channel_count:
+            raise ValueError("Buffer length must be a multiple of the channel count")
+        if self._paused:
+            self._loop_buffer = buffer
+            self._resume()
+            return True
+        self._pio.background_write(loop=buffer)
+        _ = self._pio.last_write  # Discard any output buffer which has already finished
+        self._loop_buffer = buffer
+        return True
+
+    def stop_loop(self) -> None:
+        """Stop playing the buffer provided to :meth:`play_loop` once it finishes and resume
+        playing the output buffers, which are cleared to silence. :meth:`write` does this
+        automatically and queues its data to play directly after the loop.
+        """
+        if self._paused:
+            self._loop_buffer = None
+        elif self._loop_buffer is not None:
+            self._resume_buffers()
+
+    def play(self, source: circuitpython_typing.ReadableBuffer, source_length: int = None) -> bool:
+        """Plays samples from the source data to the output of the I2S bus bytes of samples to
+        destination. This is blocking.
+
+        :param destination: The destination buffer to write the samples from the I2S bus to.
+        :type destination: :class:`circuitpython_typing.ReadableBuffer`
+        :param destination_length: The number of samples to write to the destination buffer. If not
+            provided, the full size of the destination buffer will be written to.
+        :type destination_length: `int`
+        """
+        if not self._writable:
+            return False
+        if source_length is None:
+            source_length = len(source)
+        index = 0
+        while index < source_length:
+            self.write(source[index : index + min(source_length - index, self._buffer_size)])
+            index += self._buffer_size
+        return True
+
+    def read(self, block: bool = True) -> array.array:
+        """Read the input data from the I2S bus as an array of audio samples.
+
+        :param block: Whether or not to wait until data from the I2S bus can be read from.
+        :type block: `bool`, optional
+        :return: An :class:`array.array` object with :attr:`buffer_size` elements. If the
+            :attr:`channel_count` is stereo (2), the left and right channels will alternate between
+            even and odd indexes.
+        """
+        if not self._readable:
+            return None
+        if self._paused:
+            self._resume()
+        profiler = self._profiler
+        if profiler:
+            self._profile_enter()
+            start = time.monotonic_ns()
+        waited = False
+        if block:
+            while not (data := self._pio.last_read):
+                waited = True
+        else:
+            data = self._pio.last_read
+        if profiler:
+            self._profile_wait += profiler.add_time("read_wait", start)
+        if not data:
+            self._poll_time = time.monotonic_ns()
+        else:
+            self._mark_swap(0 if data is self._buffer_in[0] else 1, waited)
+            if self._input_filter:
+                self._input_filter.process(data)
+            if self._input_meter:
+                self._input_meter.process(data)
+        if profiler:
+            self._profile_exit(bool(data))
+        return data
+
+    def record(
+        self, destination: circuitpython_typing.ReadableBuffer, destination_length: int = None
+    ) -> bool:
+        """Records samples from the I2S bus to the destination. This is blocking.
+
+        :param destination: The destination buffer to write the samples from the I2S bus to.
+        :type destination: :class:`circuitpython_typing.ReadableBuffer`
+        :param destination_length: The number of samples to write to the destination buffer. If not
+            provided, the full size of the destination buffer will be written to.
+        :type destination_length: `int`
+        :return: Whether or not the recording operation was successful.
+        """
+        if not self._readable:
+            return False
+        if destination_length is None:
+            destination_length = len(destination)
+        index = 0
+        while index < destination_length:
+            buffer = self.read()
+            if not buffer:
+                return False
+            if self._profiler:
+                start = time.monotonic_ns()
+            for i in range(min(destination_length - index, self._buffer_size)):
+                destination[index + i] = buffer[i]
+            if self._profiler:
+                self._profiler.add_time("record_copy", start)
+                # The copy has been measured and is not user processing
+                self._profile_return = None
+            index += self._buffer_size
+        return True
@@ -0,0 +1,439 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Cooper Dalrymple
+#
+# SPDX-License-Identifier: MIT
+"""
+`pio_i2s.adpcm`
+================================================================================
+
+Compressed recording and playback of I2S audio data using IMA-ADPCM WAV files.
+
+* Author(s): Cooper Dalrymple
+"""
+
+from __future__ import annotations
+
+import array
+import struct
+
+# Only imported by type checkers, annotations are not evaluated at runtime
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import circuitpython_typing
+
+_ADPCM_INDEX_TABLE = (-1, -1, -1, -1, 2, 4, 6, 8, -1, -1, -1, -1, 2, 4, 6, 8)
+
+_ADPCM_STEP_TABLE = (
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45, 50, 55, 60, 66,
+    73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230, 253, 279, 307, 337, 371, 408,
+    449, 494, 544, 598, 658, 724, 796, 876, 963, 1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066,
+    2272, 2499, 2749, 3024, 3327, 3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630,
+    9493, 10442, 11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767,
+)  # fmt: skip
+
+_ADPCM_FORMAT = 0x11
+
+
+_adpcm_deltas = []
+
+
+def _get_adpcm_samples_per_block(channel_count: int, block_size: int) -> int:
+    return (block_size - 4 * channel_count) * 2 // channel_count + 1
+
+
+def _get_adpcm_deltas() -> list:
+    # The decoded difference for each step index and 3-bit magnitude, built when first needed
+    if not _adpcm_deltas:
+        for step in _ADPCM_STEP_TABLE:
+            for magnitude in range(8):
+                delta = step >> 3
+                if magnitude & 4:
+                    delta += step
+                if magnitude & 2:
+                    delta += step >> 1
+                if magnitude & 1:
+                    delta += step >> 2
+                _adpcm_deltas.append(delta)
+    return _adpcm_deltas
+
+
+class ADPCMWriter:
+    """Encode 16-bit signed audio data to a WAV file using IMA-ADPCM compression (format 0x11),
+    which stores each sample in 4 bits. Whole blocks are encoded directly from the data passed to
+    :meth:`writeframes`, and only the samples left over are copied into a preallocated buffer until
+    the next call, so the output of :meth:`~pio_i2s.I2S.read` can be written directly regardless of
+    its size. Encoding is done in Python, so use the benchmark example to check that it keeps up
+    with the sample rate on a given board.
+
+    The file must be seekable so that the header can be completed by :meth:`close`.
+
+    :param file: The path of the file or a file object opened in binary write mode.
+    :type file: `str` | :class:`io.BufferedWriter`
+    :param channel_count: The number of channels. 1 = mono; 2 = stereo.
+    :type channel_count: `int`, optional
+    :param sample_rate: The sample rate of the audio data.
+    :type sample_rate: `int`, optional
+    :param block_size: The size in bytes of each encoded block. Must be a multiple of 4 times the
+        number of channels.
+    :type block_size: `int`, optional
+    """
+
+    def __init__(
+        self,
+        file: str,
+        channel_count: int = 1,
+        sample_rate: int = 22050,
+        block_size: int = 256,
+    ):
+        if channel_count < 1 or channel_count > 2:
+            raise ValueError("Invalid channel count")
+        if block_size <= 4 * channel_count or block_size % (4 * channel_count):
+            raise ValueError("Invalid block size")
+
+        self._close_file = isinstance(file, str)
+        self._file = open(file, "wb") if self._close_file else file
+        self._channel_count = channel_count
+        self._sample_rate = sample_rate
+        self._block_size = block_size
+        self._samples_per_block = _get_adpcm_samples_per_block(channel_count, block_size)
+
+        self._pcm = array.array("h", [0] * (self._samples_per_block * channel_count))
+        self._pcm_length = 0
+        self._block = bytearray(block_size)
+        self._index = [0] * channel_count
+        self._deltas = _get_adpcm_deltas()
+        self._frame_count = 0
+        self._data_size = 0
+
+        self._write_header()
+
+    @property
+    def samples_per_block(self) -> int:
+        """The number of frames encoded within each block. This property is read-only."""
+        return self._samples_per_block
+
+    @property
+    def frame_count(self) -> int:
+        """The number of frames written so far. This property is read-only."""
+        return self._frame_count
+
+    def _write_header(self) -> None:
+        self._file.write(
+            struct.pack(
+                "<4sI4s4sIHHIIHHHH4sII4sI",
+                b"RIFF",
+                52 + self._data_size,
+                b"WAVE",
+                b"fmt ",
+                20,
+                _ADPCM_FORMAT,
+                self._channel_count,
+                self._sample_rate,
+                self._sample_rate * self._block_size // self._samples_per_block,
+                self._block_size,
+                4,
+                2,
+                self._samples_per_block,
+                b"fact",
+                4,
+                self._frame_count,
+                b"data",
+                self._data_size,
+            )
+        )
+
+    def _encode_block(  # noqa: PLR0912, PLR0914, PLR0915
+        self, pcm: circuitpython_typing.ReadableBuffer, start: int
+    ) -> None:
+        block = self._block
+        channel_count = self._channel_count
+        index_table, step_table = _ADPCM_INDEX_TABLE, _ADPCM_STEP_TABLE
+        deltas = self._deltas
+        pos = 0
+        for channel in range(channel_count):
+            predictor = pcm[start + channel]
+            block[pos] = predictor & 0xFF
+            block[pos + 1] = (predictor >> 8) & 0xFF
+            block[pos + 2] = self._index[channel]
+            block[pos + 3] = 0
+            pos += 4
+
+        # Each channel is stored in alternating chunks of 8 samples (4 bytes). The magnitude of
+        # each nibble is found with one division rather than by successive approximation, and two
+        # samples are encoded per iteration so that each byte is only stored once.
+        for channel in range(channel_count):
+            predictor = pcm[start + channel]
+            index = self._index[channel]
+            step = step_table[index]
+            for group in range((self._samples_per_block - 1) // 8):
+                pos = 4 * channel_count * (group + 1) + 4 * channel
+                offset = start + (1 + group * 8) * channel_count + channel
+                for _ in range(4):
+                    diff = pcm[offset] - predictor
+                    if diff < 0:
+                        low = (-diff << 2) // step
+                        if low > 7:
+                            low = 7
+                        predictor -= deltas[(index << 3) | low]
+                        if predictor < -32768:
+                            predictor = -32768
+                        low |= 8
+                    else:
+                        low = (diff << 2) // step
+                        if low > 7:
+                            low = 7
+                        predictor += deltas[(index << 3) | low]
+                        if predictor > 32767:
+                            predictor = 32767
+                    index += index_table[low]
+                    if index < 0:
+                        index = 0
+                    elif index > 88:
+                        index = 88
+                    step = step_table[index]
+                    offset += channel_count
+
+                    diff = pcm[offset] - predictor
+                    if diff < 0:
+                        high = (-diff << 2) // step
+                        if high > 7:
+                            high = 7
+                        predictor -= deltas[(index << 3) | high]
+                        if predictor < -32768:
+                            predictor = -32768
+                        high |= 8
+                    else:
+                        high = (diff << 2) // step
+                        if high > 7:
+                            high = 7
+                        predictor += deltas[(index << 3) | high]
+                        if predictor > 32767:
+                            predictor = 32767
+                    index += index_table[high]
+                    if index < 0:
+                        index = 0
+                    elif index > 88:
+                        index = 88
+                    step = step_table[index]
+                    offset += channel_count
+
+                    block[pos] = low | (high << 4)
+                    pos += 1
+            self._index[channel] = index
+
+        self._file.write(block)
+        self._data_size += self._block_size
+
+    def writeframes(self, data: array.array) -> None:
+        """Encode interleaved 16-bit signed audio data and write any completed blocks to the file.
+        Whole blocks are encoded directly from data, and only samples which do not fill a block
+        are copied to be encoded with the next call.
+
+        :param data: The array of sample data with a format of "h".
+        :type data: :class:`array.array`
+        """
+        pcm = self._pcm
+        length = len(data) - len(data) % self._channel_count
+        self._frame_count += length // self._channel_count
+        i = 0
+        if self._pcm_length:
+            i = min(length, len(pcm) - self._pcm_length)
+            pcm[self._pcm_length : self._pcm_length + i] = data[:i]
+            self._pcm_length += i
+            if self._pcm_length < len(pcm):
+                return
+            self._encode_block(pcm, 0)
+            self._pcm_length = 0
+        while length - i >= len(pcm):
+            self._encode_block(data, i)
+            i += len(pcm)
+        if i < length:
+            pcm[: length - i] = data[i:length]
+            self._pcm_length = length - i
+
+    def close(self) -> None:
+        """Encode any remaining data as a final block padded with silence, complete the header
+        and close the file if it was opened by this object.
+        """
+        if self._file is None:
+            return
+        if self._pcm_length:
+            for i in range(self._pcm_length, len(self._pcm)):
+                self._pcm[i] = 0
+            self._encode_block(self._pcm, 0)
+            self._pcm_length = 0
+        self._file.seek(0)
+        self._write_header()
+        if self._close_file:
+            self._file.close()
+        self._file = None
+
+    def __enter__(self) -> ADPCMWriter:
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback) -> None:
+        self.close()
+
+
+class ADPCMReader:
+    """Decode a WAV file using IMA-ADPCM compression (format 0x11) into 16-bit signed audio data.
+    Blocks are read into a preallocated buffer and decoded on demand so that the output can be
+    passed to :meth:`~pio_i2s.I2S.write` in buffer sized pieces.
+
+    :param file: The path of the file or a file object opened in binary read mode.
+    :type file: `str` | :class:`io.BufferedReader`
+    """
+
+    def __init__(self, file: str):
+        self._close_file = isinstance(file, str)
+        self._file = open(file, "rb") if self._close_file else file
+
+        if self._file.read(12)[8:] != b"WAVE":
+            raise ValueError("Invalid WAV file")
+        self._frame_count = None
+        while True:
+            header = self._file.read(8)
+            if len(header) < 8:
+                raise ValueError("Missing data chunk")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"data":
+                break
+            chunk = self._file.read(chunk_size + (chunk_size & 1))
+            if chunk_id == b"fmt ":
+                (
+                    format_tag,
+                    self._channel_count,
+                    self._sample_rate,
+                    _,
+                    self._block_size,
+                    bits_per_sample,
+                ) = struct.unpack("<HHIIHH", chunk[:16])
+                if format_tag != _ADPCM_FORMAT or bits_per_sample != 4:
+                    raise ValueError("Unsupported WAV format")
+            elif chunk_id == b"fact":
+                self._frame_count = struct.unpack("<I", chunk[:4])[0]
+
+        self._data_remaining = chunk_size
+        self._samples_per_block = _get_adpcm_samples_per_block(
+            self._channel_count, self._block_size
+        )
+        if self._frame_count is None:
+            self._frame_count = chunk_size // self._block_size * self._samples_per_block
+        self._frames_remaining = self._frame_count
+
+        self._block = bytearray(self._block_size)
+        self._pcm = array.array("h", [0] * (self._samples_per_block * self._channel_count))
+        self._pcm_position = 0
+        self._pcm_length = 0
+
+    @property
+    def channel_count(self) -> int:
+        """The number of channels. This property is read-only."""
+        return self._channel_count
+
+    @property
+    def sample_rate(self) -> int:
+        """The sample rate of the audio data. This property is read-only."""
+        return self._sample_rate
+
+    @property
+    def frame_count(self) -> int:
+        """The total number of frames within the file. This property is read-only."""
+        return self._frame_count
+
+    def _decode_block(self) -> None:  # noqa: PLR0912, PLR0914, PLR0915
+        length = min(self._block_size, self._data_remaining)
+        block = memoryview(self._block)[:length]
+        if self._file.readinto(block) != length or length <= 4 * self._channel_count:
+            self._data_remaining = 0
+            self._pcm_length = 0
+            return
+        self._data_remaining -= length
+
+        pcm = self._pcm
+        channel_count = self._channel_count
+        index_table, step_table = _ADPCM_INDEX_TABLE, _ADPCM_STEP_TABLE
+        groups = (length - 4 * channel_count) // (4 * channel_count)
+        for channel in range(channel_count):
+            pos = 4 * channel
+            predictor = block[pos] | (block[pos + 1] << 8)
+            if predictor > 32767:
+                predictor -= 65536
+            index = min(block[pos + 2], 88)
+            pcm[channel] = predictor
+            start = 4 * channel_count + 4 * channel
+            for group in range(groups):
+                pos = start + group * 4 * channel_count
+                offset = (1 + group * 8) * channel_count + channel
+                for k in range(8):
+                    if k & 1:
+                        nibble = block[pos] >> 4
+                        pos += 1
+                    else:
+                        nibble = block[pos] & 0x0F
+                    step = step_table[index]
+                    delta = step >> 3
+                    if nibble & 4:
+                        delta += step
+                    if nibble & 2:
+                        delta += step >> 1
+                    if nibble & 1:
+                        delta += step >> 2
+                    if nibble & 8:
+                        predictor -= delta
+                        if predictor < -32768:
+                            predictor = -32768
+                    else:
+                        predictor += delta
+                        if predictor > 32767:
+                            predictor = 32767
+                    index += index_table[nibble]
+                    if index < 0:
+                        index = 0
+                    elif index > 88:
+                        index = 88
+                    pcm[offset] = predictor
+                    offset += channel_count
+
+        self._pcm_position = 0
+        self._pcm_length = (1 + groups * 8) * channel_count
+
+    def readframes(self, destination: circuitpython_typing.WriteableBuffer) -> int:
+        """Decode interleaved 16-bit signed audio data into the destination buffer.
+
+        :param destination: The buffer to fill with sample data, such as an :class:`array.array`
+            with a format of "h".
+        :type destination: :class:`circuitpython_typing.WriteableBuffer`
+        :return: The number of samples written to destination. If this is less than the length of
+            destination, the end of the file has been reached.
+        """
+        pcm = self._pcm
+        length = min(
+            len(destination) - len(destination) % self._channel_count,
+            self._frames_remaining * self._channel_count,
+        )
+        i = 0
+        while i < length:
+            if self._pcm_position >= self._pcm_length:
+                self._decode_block()
+                if not self._pcm_length:
+                    break
+            count = min(length - i, self._pcm_length - self._pcm_position)
+            for j in range(count):
+                destination[i + j] = pcm[self._pcm_position + j]
+            self._pcm_position += count
+            i += count
+        self._frames_remaining -= i // self._channel_count
+        return i
+
+    def close(self) -> None:
+        """Close the file if it was opened by this object."""
+        if self._close_file and self._file is not None:
+            self._file.close()
+        self._file = None
+
+    def __enter__(self) -> ADPCMReader:
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,655 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Cooper Dalrymple
+#
+# SPDX-License-Identifier: MIT
+"""
+`pio_i2s.analysis`
+================================================================================
+
+Metering, filtering, spectrum analysis and gating of I2S audio data.
+
+* Author(s): Cooper Dalrymple
+"""
+
+from __future__ import annotations
+
+import array
+import math
+
+# Only imported by type checkers, annotations are not evaluated at runtime
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import circuitpython_typing
+
+    from pio_i2s import I2S
+
+try:
+    from ulab import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from ulab.utils import spectrogram as _spectrogram
+except ImportError:
+    _spectrogram = None
+
+try:
+    from ulab.scipy.signal import sosfilt as _sosfilt
+except ImportError:
+    _sosfilt = None
+
+
+def _get_ulab_dtype(buffer_format: str) -> int:
+    if np is None:
+        return None
+    return {
+        "b": np.int8,
+        "B": np.uint8,
+        "h": np.int16,
+        "H": np.uint16,
+    }.get(buffer_format)
+
+
+class Meter:
+    """Measure the peak level, RMS level and number of clipped samples of each channel of an audio
+    stream. Blocks are analyzed in place without copying the sample data. When ulab is available
+    and the samples are 8 or 16 bits, strided views of the block are used to calculate the results
+    natively. Otherwise, the samples are processed in Python.
+
+    A meter can be attached to a bus using :attr:`~pio_i2s.I2S.input_meter` or
+    :attr:`~pio_i2s.I2S.output_meter`, or blocks can be provided manually using :meth:`process`.
+
+    :param i2s: The bus which determines the format of the sample data.
+    :type i2s: :class:`~pio_i2s.I2S`
+    :param decimation: Only every nth frame of each block will be analyzed. Higher values reduce
+        processing time at the expense of accuracy. Clipped samples which are skipped will not be
+        counted.
+    :type decimation: `int`, optional
+    """
+
+    def __init__(self, i2s: I2S, decimation: int = 1):
+        if decimation < 1:
+            raise ValueError("Decimation must be greater than 0")
+        self._channel_count = i2s.channel_count
+        self._decimation = decimation
+        self._dtype = _get_ulab_dtype(i2s.buffer_format)
+        self._silence = i2s.silence
+        self._full_scale = i2s.silence - i2s.sample_min
+        self._clip_high = i2s.sample_max
+        self._clip_low = i2s.sample_min
+        self._peak = [0.0] * self._channel_count
+        self._rms = [0.0] * self._channel_count
+        self._clip_count = [0] * self._channel_count
+
+    @property
+    def peak(self) -> tuple:
+        """The peak level of each channel within the last processed block from 0.0 to 1.0. This
+        property is read-only.
+        """
+        return tuple(self._peak)
+
+    @property
+    def rms(self) -> tuple:
+        """The RMS level of each channel within the last processed block from 0.0 to 1.0. This
+        property is read-only.
+        """
+        return tuple(self._rms)
+
+    @property
+    def clip_count(self) -> tuple:
+        """The number of samples of each channel at full scale since the meter was created or last
+        reset. This property is read-only.
+        """
+        return tuple(self._clip_count)
+
+    def reset(self) -> None:
+        """Reset the levels and clip count of all channels."""
+        for channel in range(self._channel_count):
+            self._peak[channel] = 0.0
+            self._rms[channel] = 0.0
+            self._clip_count[channel] = 0
+
+    def process(self, data: circuitpython_typing.ReadableBuffer) -> None:
+        """Analyze a block of interleaved sample data and update the levels of each channel.
+
+        :param data: The array of sample data.
+        :type data: :class:`circuitpython_typing.ReadableBuffer`
+        """
+        if not data:
+            return
+        step = self._channel_count * self._decimation
+        silence = self._silence
+        samples = np.frombuffer(data, dtype=self._dtype) if self._dtype is not None else None
+        for channel in range(self._channel_count):
+            if samples is not None:
+                view = samples[channel::step]
+                if not len(view):
+                    continue
+                high, low = int(np.max(view)), int(np.min(view))
+                offset = float(np.mean(view)) - silence
+                deviation = float(np.std(view))
+                rms = math.sqrt(deviation * deviation + offset * offset)
+                clips = 0
+                if high >= self._clip_high:
+                    clips += int(np.sum(view >= self._clip_high))
+                if low <= self._clip_low:
+                    clips += int(np.sum(view <= self._clip_low))
+            else:
+                high = low = silence
+                total = count = clips = 0
+                for i in range(channel, len(data), step):
+                    value = data[i]
+                    if value > high:
+                        high = value
+                    elif value < low:
+                        low = value
+                    if value >= self._clip_high or value <= self._clip_low:
+                        clips += 1
+                    value -= silence
+                    total += value * value
+                    count += 1
+                if not count:
+                    continue
+                rms = math.sqrt(total / count)
+            self._peak[channel] = max(high - silence, silence - low) / self._full_scale
+            self._rms[channel] = rms / self._full_scale
+            self._clip_count[channel] += clips
+
+
+class Biquad:
+    """The coefficients of a second-order filter section normalized so that a0 is 1. Use the class
+    methods to design common filter types, which are based on the formulas within the
+    `Audio EQ Cookbook <https://www.w3.org/TR/audio-eq-cookbook/>`_.
+
+    :param b0: The first feedforward coefficient.
+    :type b0: `float`
+    :param b1: The second feedforward coefficient.
+    :type b1: `float`
+    :param b2: The third feedforward coefficient.
+    :type b2: `float`
+    :param a1: The first feedback coefficient.
+    :type a1: `float`
+    :param a2: The second feedback coefficient.
+    :type a2: `float`
+    """
+
+    def __init__(self, b0: float, b1: float, b2: float, a1: float, a2: float):  # noqa: PLR0913
+        self._coefficients = (b0, b1, b2, 1.0, a1, a2)
+
+    @property
+    def coefficients(self) -> tuple:
+        """The coefficients of the section in second-order sections format,
+        ``(b0, b1, b2, 1.0, a1, a2)``. This property is read-only.
+        """
+        return self._coefficients
+
+    @classmethod
+    def _from_cookbook(  # noqa: PLR0913
+        cls, b0: float, b1: float, b2: float, a0: float, a1: float, a2: float
+    ) -> Biquad:
+        return cls(b0 / a0, b1 / a0, b2 / a0, a1 / a0, a2 / a0)
+
+    @classmethod
+    def lowpass(cls, sample_rate: int, frequency: float, q: float = 0.7071) -> Biquad:
+        """Design a low-pass filter.
+
+        :param sample_rate: The sample rate of the audio data.
+        :type sample_rate: `int`
+        :param frequency: The cutoff frequency in Hz.
+        :type frequency: `float`
+        :param q: The quality factor of the filter.
+        :type q: `float`, optional
+        """
+        w0 = 2 * math.pi * frequency / sample_rate
+        cos_w0, alpha = math.cos(w0), math.sin(w0) / (2 * q)
+        b = (1 - cos_w0) / 2
+        return cls._from_cookbook(b, 2 * b, b, 1 + alpha, -2 * cos_w0, 1 - alpha)
+
+    @classmethod
+    def highpass(cls, sample_rate: int, frequency: float, q: float = 0.7071) -> Biquad:
+        """Design a high-pass filter.
+
+        :param sample_rate: The sample rate of the audio data.
+        :type sample_rate: `int`
+        :param frequency: The cutoff frequency in Hz.
+        :type frequency: `float`
+        :param q: The quality factor of the filter.
+        :type q: `float`, optional
+        """
+        w0 = 2 * math.pi * frequency / sample_rate
+        cos_w0, alpha = math.cos(w0), math.sin(w0) / (2 * q)
+        b = (1 + cos_w0) / 2
+        return cls._from_cookbook(b, -2 * b, b, 1 + alpha, -2 * cos_w0, 1 - alpha)
+
+    @classmethod
+    def peaking(cls, sample_rate: int, frequency: float, gain: float, q: float = 1.0) -> Biquad:
+        """Design a peaking equalizer filter which boosts or cuts a band of frequencies.
+
+        :param sample_rate: The sample rate of the audio data.
+        :type sample_rate: `int`
+        :param frequency: The center frequency in Hz.
+        :type frequency: `float`
+        :param gain: The gain at the center frequency in dB.
+        :type gain: `float`
+        :param q: The quality factor of the filter.
+        :type q: `float`, optional
+        """
+        w0 = 2 * math.pi * frequency / sample_rate
+        cos_w0, alpha = math.cos(w0), math.sin(w0) / (2 * q)
+        a = 10 ** (gain / 40)
+        return cls._from_cookbook(
+            1 + alpha * a, -2 * cos_w0, 1 - alpha * a, 1 + alpha / a, -2 * cos_w0, 1 - alpha / a
+        )
+
+    @classmethod
+    def dc_block(cls, sample_rate: int, frequency: float = 10.0) -> Biquad:
+        """Design a first-order filter which removes any DC offset with minimal effect on audible
+        frequencies.
+
+        :param sample_rate: The sample rate of the audio data.
+        :type sample_rate: `int`
+        :param frequency: The cutoff frequency in Hz.
+        :type frequency: `float`, optional
+        """
+        r = math.exp(-2 * math.pi * frequency / sample_rate)
+        g = (1 + r) / 2  # unity gain at high frequencies
+        return cls(g, -g, 0.0, -r, 0.0)
+
+
+class Filter:
+    """Apply a cascade of :class:`Biquad` sections to each channel of interleaved audio data in
+    place. The state of each channel is kept between blocks so that a continuous stream can be
+    filtered one block at a time. When ulab is available and the samples are 8 or 16 bits,
+    ``ulab.scipy.signal.sosfilt`` is used on strided views of each channel. Otherwise, the
+    sections are evaluated in Python without allocating memory.
+
+    With ulab, the offset of unsigned samples is removed in place within a preallocated array, but
+    ``sosfilt`` returns a new output array and state for each channel of every block and the
+    output is clipped into another new array, as neither function can write into an existing one.
+
+    A filter can be attached to a bus using :attr:`~pio_i2s.I2S.input_filter` or
+    :attr:`~pio_i2s.I2S.output_filter`, or blocks can be provided manually using :meth:`process`.
+
+    :param i2s: The bus which determines the format of the sample data.
+    :type i2s: :class:`~pio_i2s.I2S`
+    :param biquads: The filter sections to apply in order.
+    :type biquads: `list` of :class:`Biquad`
+    """
+
+    def __init__(self, i2s: I2S, biquads: list):
+        if not biquads:
+            raise ValueError("At least one biquad must be specified")
+        self._channel_count = i2s.channel_count
+        self._silence = i2s.silence
+        self._high = i2s.sample_max
+        self._low = i2s.sample_min
+        self._coefficients = tuple(biquad.coefficients for biquad in biquads)
+
+        self._dtype = _get_ulab_dtype(i2s.buffer_format) if _sosfilt is not None else None
+        if self._dtype is not None:
+            self._sos = np.array(self._coefficients)
+            self._work = np.zeros(i2s.buffer_size // i2s.channel_count) if i2s.silence else None
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the state of all channels, such as when the stream is interrupted."""
+        if self._dtype is not None:
+            self._state = [
+                np.zeros((len(self._coefficients), 2)) for i in range(self._channel_count)
+            ]
+        else:
+            self._state = [
+                [0.0] * (2 * len(self._coefficients)) for i in range(self._channel_count)
+            ]
+
+    def process(self, data: circuitpython_typing.WriteableBuffer) -> None:  # noqa: PLR0914
+        """Filter a block of interleaved sample data in place.
+
+        :param data: The array of sample data.
+        :type data: :class:`circuitpython_typing.WriteableBuffer`
+        """
+        if not data:
+            return
+        step = self._channel_count
+        silence, high, low = self._silence, self._high, self._low
+
+        if self._dtype is not None:
+            samples = np.frombuffer(data, dtype=self._dtype)
+            for channel in range(step):
+                view = samples[channel::step]
+                if silence:
+                    # Grown once if a longer block than the buffer size is processed manually
+                    if len(self._work) < len(view):
+                        self._work = np.zeros(len(view))
+                    work = self._work[: len(view)]
+                    work[:] = view
+                    work -= silence
+                else:
+                    work = view
+                result, self._state[channel] = _sosfilt(self._sos, work, zi=self._state[channel])
+                if silence:
+                    result += silence
+                view[:] = np.clip(result, low, high)
+            return
+
+        coefficients = self._coefficients
+        for channel in range(step):
+            state = self._state[channel]
+            for i in range(channel, len(data), step):
+                x = data[i] - silence
+                k = 0
+                for b0, b1, b2, _, a1, a2 in coefficients:
+                    y = b0 * x + state[k]
+                    state[k] = b1 * x - a1 * y + state[k + 1]
+                    state[k + 1] = b2 * x - a2 * y
+                    x = y
+                    k += 2
+                value = round(x) + silence
+                data[i] = high if value > high else (low if value < low else value)
+
+
+class Spectrum:
+    """Calculate the frequency spectrum of each channel of an input bus using a windowed FFT. The
+    window, the overlapping frame and the output bins of each channel are allocated once and
+    reused for every block, and the offset and scale of the samples are applied in place. Blocks
+    are deinterleaved using strided views so that stereo input does not need to be copied before
+    analysis. Requires ulab and 8 or 16 bit samples.
+
+    No memory is allocated per frame if ``ulab.utils.spectrogram`` supports the ``out`` and
+    ``scratchpad`` arguments. Otherwise, the arrays returned by the FFT are allocated for each
+    channel of every frame.
+
+    Either call :meth:`read` in place of :meth:`~pio_i2s.I2S.read` or pass each block to
+    :meth:`process`. A new set of :attr:`bins` is published whenever enough frames have been
+    received to satisfy the frame rate.
+
+    :param i2s: The input bus to analyze.
+    :type i2s: :class:`~pio_i2s.I2S`
+    :param fft_size: The number of frames used for each FFT. Must be a power of 2.
+    :type fft_size: `int`, optional
+    :param frame_rate: The maximum number of times per second that the spectrum is calculated.
+        If this is greater than the sample rate divided by fft_size, frames will overlap.
+    :type frame_rate: `int`, optional
+    :param window: Whether or not to apply a Hann window before calculating the FFT.
+    :type window: `bool`, optional
+    """
+
+    def __init__(
+        self,
+        i2s: I2S,
+        fft_size: int = 256,
+        frame_rate: int = 30,
+        window: bool = True,
+    ):
+        if np is None:
+            raise RuntimeError("ulab is required for spectrum analysis")
+        self._dtype = _get_ulab_dtype(i2s.buffer_format)
+        if self._dtype is None:
+            raise ValueError("Unsupported bits per sample")
+        if fft_size < 2 or fft_size & (fft_size - 1):
+            raise ValueError("FFT size must be a power of 2")
+        if frame_rate < 1:
+            raise ValueError("Frame rate must be greater than 0")
+
+        self._i2s = i2s
+        self._channel_count = i2s.channel_count
+        self._sample_rate = i2s.sample_rate
+        self._fft_size = fft_size
+        self._hop = max(1, i2s.sample_rate // frame_rate)
+        self._silence = i2s.silence
+
+        # Normalize magnitudes to full scale within the window
+        scale = 2 / (fft_size * (i2s.silence - i2s.sample_min))
+        if window:
+            self._window = np.array(
+                [(1.0 - math.cos(2 * math.pi * i / fft_size)) * scale for i in range(fft_size)]
+            )
+        else:
+            self._window = np.full(fft_size, scale)
+
+        self._frames = [np.full(fft_size, self._silence) for i in range(self._channel_count)]
+        self._work = np.zeros(fft_size)
+        self._scratchpad = np.zeros(2 * fft_size)
+        self._spectra = [np.zeros(fft_size) for i in range(self._channel_count)]
+        self._bins = [spectrum[: fft_size // 2] for spectrum in self._spectra]
+        self._in_place = _spectrogram is not None
+        self._pending = 0
+        self._frame_count = 0
+
+    @property
+    def fft_size(self) -> int:
+        """The number of frames used for each FFT. This property is read-only."""
+        return self._fft_size
+
+    @property
+    def resolution(self) -> float:
+        """The width of each frequency bin in Hz. This property is read-only."""
+        return self._sample_rate / self._fft_size
+
+    @property
+    def bins(self) -> tuple:
+        """The magnitude of each frequency bin from 0 Hz up to half of the sample rate as a
+        :class:`ulab.numpy.ndarray` for each channel. A sine wave at full scale has a magnitude
+        of roughly 1.0. The same arrays are updated in place whenever a new spectrum is published.
+        This property is read-only.
+        """
+        return tuple(self._bins)
+
+    @property
+    def frame_count(self) -> int:
+        """The number of times that the spectrum has been published. This property is read-only."""
+        return self._frame_count
+
+    def _calculate(self, channel: int) -> None:
+        work = self._work
+        work[:] = self._frames[channel]
+        if self._silence:
+            work -= self._silence
+        work *= self._window
+
+        if self._in_place:
+            try:
+                _spectrogram(work, out=self._spectra[channel], scratchpad=self._scratchpad)
+                return
+            except TypeError:
+                # Older versions of ulab do not support preallocated arrays
+                self._in_place = False
+
+        if _spectrogram is not None:
+            magnitude = _spectrogram(work)
+        else:
+            result = np.fft.fft(work)
+            if isinstance(result, tuple):
+                real, imag = result
+                magnitude = np.sqrt(real * real + imag * imag)
+            else:
+                magnitude = abs(result)
+        self._bins[channel][:] = magnitude[: self._fft_size // 2]
+
+    def process(self, data: circuitpython_typing.ReadableBuffer) -> bool:
+        """Add a block of interleaved sample data to the frame of each channel and calculate the
+        spectrum if it is due.
+
+        :param data: The array of sample data.
+        :type data: :class:`circuitpython_typing.ReadableBuffer`
+        :return: Whether or not new :attr:`bins` were published.
+        """
+        if not data:
+            return False
+        samples = np.frombuffer(data, dtype=self._dtype)
+        size = self._fft_size
+        count = len(samples) // self._channel_count
+        for channel in range(self._channel_count):
+            view = samples[channel :: self._channel_count]
+            frame = self._frames[channel]
+            if count >= size:
+                frame[:] = view[count - size : count]
+            else:
+                frame[: size - count] = frame[count:]
+                frame[size - count :] = view[:count]
+
+        self._pending += count
+        if self._pending < self._hop:
+            return False
+        # Only the most recent frame is calculated if more than one is due
+        self._pending %= self._hop
+
+        for channel in range(self._channel_count):
+            self._calculate(channel)
+        self._frame_count += 1
+        return True
+
+    def read(self, block: bool = True) -> array.array:
+        """Read the next block from the input bus using :meth:`~pio_i2s.I2S.read` and analyze it.
+
+        :param block: Whether or not to wait until data from the I2S bus can be read from.
+        :type block: `bool`, optional
+        :return: The block of sample data, see :meth:`~pio_i2s.I2S.read`.
+        """
+        data = self._i2s.read(block)
+        self.process(data)
+        return data
+
+
+class Gate:
+    """Detect activity on an input bus by measuring the RMS level of each block so that silent
+    blocks can be skipped by any further processing. The gate opens when the level of any channel
+    reaches the threshold and closes once it has stayed below the release level for the hangover
+    period. A ring of recent blocks is kept while the gate is closed so that the start of each
+    active segment is not lost.
+
+    Either call :meth:`read` in place of :meth:`~pio_i2s.I2S.read` or pass each block to
+    :meth:`process`.
+
+    :param i2s: The input bus to monitor.
+    :type i2s: :class:`~pio_i2s.I2S`
+    :param threshold: The RMS level from 0.0 to 1.0 at which the gate opens.
+    :type threshold: `float`, optional
+    :param release: The RMS level from 0.0 to 1.0 below which the gate may close. Must not be
+        greater than threshold. Defaults to half of threshold.
+    :type release: `float`, optional
+    :param hangover: The duration in seconds that the gate stays open after the level falls below
+        release.
+    :type hangover: `float`, optional
+    :param pre_roll: The duration in seconds of audio before the gate opens which is included at
+        the start of each active segment. Each block of pre-roll is copied into a preallocated
+        buffer while the gate is closed. Set to 0 to disable.
+    :type pre_roll: `float`, optional
+    :param decimation: The decimation of the internal :class:`Meter`.
+    :type decimation: `int`, optional
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        i2s: I2S,
+        threshold: float = 0.02,
+        release: float = None,
+        hangover: float = 0.5,
+        pre_roll: float = 0.1,
+        decimation: int = 4,
+    ):
+        if release is None:
+            release = threshold / 2
+        if release > threshold:
+            raise ValueError("Release must not be greater than threshold")
+        if hangover < 0 or pre_roll < 0:
+            raise ValueError("Hangover and pre-roll must not be negative")
+
+        self._i2s = i2s
+        self._meter = Meter(i2s, decimation)
+        self._threshold = threshold
+        self._release = release
+        self._channel_count = i2s.channel_count
+
+        block_duration = (i2s.buffer_size // i2s.channel_count) / i2s.sample_rate
+        self._hangover = math.ceil(hangover / block_duration)
+
+        self._ring = [
+            array.array(i2s.buffer_format, [i2s.silence] * i2s.buffer_size)
+            for i in range(math.ceil(pre_roll / block_duration))
+        ]
+        self._ring_offsets = [0] * len(self._ring)
+        self._ring_index = 0
+        self._ring_count = 0
+
+        self._active = False
+        self._hold = 0
+        self._level = 0.0
+        self._frame_offset = 0
+        self._segments = []
+
+    @property
+    def active(self) -> bool:
+        """Whether or not the gate is currently open. This property is read-only."""
+        return self._active
+
+    @property
+    def level(self) -> float:
+        """The RMS level of the loudest channel in the last processed block. This property is
+        read-only.
+        """
+        return self._level
+
+    @property
+    def frame_offset(self) -> int:
+        """The total number of frames that have been processed. This property is read-only."""
+        return self._frame_offset
+
+    def _store(self, offset: int, data: circuitpython_typing.ReadableBuffer) -> None:
+        if not self._ring:
+            return
+        self._ring[self._ring_index][: len(data)] = data
+        self._ring_offsets[self._ring_index] = offset
+        self._ring_index = (self._ring_index + 1) % len(self._ring)
+        self._ring_count = min(self._ring_count + 1, len(self._ring))
+
+    def process(self, data: circuitpython_typing.ReadableBuffer) -> list:
+        """Measure a block of interleaved sample data and update the state of the gate.
+
+        :param data: The array of sample data.
+        :type data: :class:`circuitpython_typing.ReadableBuffer`
+        :return: A list of ``(frame_offset, block)`` tuples to be processed in order, where
+            frame_offset is the position of the first frame of the block within the stream. When
+            the gate opens, this includes any pre-roll blocks before the current block. The list
+            is empty while the gate is closed. The list and pre-roll blocks are reused and are only
+            valid until the next call.
+        """
+        segments = self._segments
+        del segments[:]
+        if not data:
+            return segments
+
+        offset = self._frame_offset
+        self._frame_offset += len(data) // self._channel_count
+        self._meter.process(data)
+        self._level = max(self._meter.rms)
+
+        if not self._active:
+            if self._level < self._threshold:
+                self._store(offset, data)
+                return segments
+            self._active = True
+            self._hold = self._hangover
+            for i in range(self._ring_count):
+                index = (self._ring_index - self._ring_count + i) % len(self._ring)
+                segments.append((self._ring_offsets[index], self._ring[index]))
+            self._ring_count = 0
+        elif self._level >= self._release:
+            self._hold = self._hangover
+        elif self._hold:
+            self._hold -= 1
+        else:
+            self._active = False
+            self._store(offset, data)
+            return segments
+
+        segments.append((offset, data))
+        return segments
+
+    def read(self, block: bool = True) -> list:
+        """Read the next block from the input bus using :meth:`~pio_i2s.I2S.read` and process it.
+
+        :param block: Whether or not to wait until data from the I2S bus can be read from.
+        :type block: `bool`, optional
+        :return: The active segments, see :meth:`process`.
+        """
+        return self.process(self._i2s.read(block))
@@ -0,0 +1,176 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Cooper Dalrymple
+#
+# SPDX-License-Identifier: MIT
+"""
+`pio_i2s.profile`
+================================================================================
+
+Timing of the read and write paths of an I2S bus.
+
+* Author(s): Cooper Dalrymple
+"""
+
+from __future__ import annotations
+
+import time
+
+
+class Histogram:
+    """A distribution of integer values counted into a fixed number of bins. Bins are either of a
+    fixed width or, by default, increase in size by powers of 2 so that a wide range of durations
+    can be represented with few bins. Values beyond the last bin are counted within it.
+
+    :param bin_count: The number of bins.
+    :type bin_count: `int`, optional
+    :param bin_width: The width of each bin. If not provided, bin n contains values from
+        2 ** (n - 1) up to 2 ** n - 1 and bin 0 contains only 0.
+    :type bin_width: `int`, optional
+    """
+
+    def __init__(self, bin_count: int = 16, bin_width: int = None):
+        if bin_count < 1:
+            raise ValueError("Bin count must be greater than 0")
+        if bin_width is not None and bin_width < 1:
+            raise ValueError("Bin width must be greater than 0")
+        self._bin_width = bin_width
+        self._counts = [0] * bin_count
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all recorded values."""
+        for i in range(len(self._counts)):
+            self._counts[i] = 0
+        self._count = 0
+        self._total = 0
+        self._minimum = None
+        self._maximum = None
+
+    def add(self, value: int) -> None:
+        """Record a value.
+
+        :param value: The value to record. Negative values are counted as 0.
+        :type value: `int`
+        """
+        value = max(int(value), 0)
+        if self._bin_width:
+            index = value // self._bin_width
+        else:
+            index = 0
+            remaining = value
+            while remaining:
+                remaining >>= 1
+                index += 1
+        self._counts[min(index, len(self._counts) - 1)] += 1
+        self._count += 1
+        self._total += value
+        if self._minimum is None or value < self._minimum:
+            self._minimum = value
+        if self._maximum is None or value > self._maximum:
+            self._maximum = value
+
+    def get_bin_range(self, index: int) -> tuple:
+        """Get the range of values counted by a bin.
+
+        :param index: The index of the bin.
+        :type index: `int`
+        :return: A tuple of the lowest and highest values of the bin. The highest value of the last
+            bin is None.
+        """
+        if self._bin_width:
+            low, high = index * self._bin_width, (index + 1) * self._bin_width - 1
+        else:
+            low, high = (1 << (index - 1)) if index else 0, (1 << index) - 1
+        return (low, high if index < len(self._counts) - 1 else None)
+
+    @property
+    def counts(self) -> tuple:
+        """The number of values within each bin. This property is read-only."""
+        return tuple(self._counts)
+
+    @property
+    def count(self) -> int:
+        """The total number of recorded values. This property is read-only."""
+        return self._count
+
+    @property
+    def total(self) -> int:
+        """The sum of all recorded values. This property is read-only."""
+        return self._total
+
+    @property
+    def minimum(self) -> int:
+        """The lowest recorded value or None if empty. This property is read-only."""
+        return self._minimum
+
+    @property
+    def maximum(self) -> int:
+        """The highest recorded value or None if empty. This property is read-only."""
+        return self._maximum
+
+    @property
+    def mean(self) -> float:
+        """The average of all recorded values or None if empty. This property is read-only."""
+        return self._total / self._count if self._count else None
+
+    def __str__(self) -> str:
+        if not self._count:
+            return "count=0"
+        lines = [
+            f"count={self._count} mean={self.mean:.1f} min={self._minimum} max={self._maximum}"
+        ]
+        for i, count in enumerate(self._counts):
+            if count:
+                low, high = self.get_bin_range(i)
+                lines.append(f"  {low}-{high if high is not None else ''}: {count}")
+        return "\n".join(lines)
+
+
+class Profiler:
+    """Collect timing measurements as named :class:`Histogram` objects. Attach to a bus with
+    :attr:`~pio_i2s.I2S.profiler` to instrument the read and write paths, and use :meth:`add_time`
+    to measure sections of user code alongside them. Durations are recorded in microseconds.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+
+    @property
+    def histograms(self) -> dict:
+        """The recorded histograms by name. This property is read-only."""
+        return self._histograms
+
+    def add(self, name: str, value: int, bin_width: int = None) -> None:
+        """Record a value to a histogram, creating it if necessary.
+
+        :param name: The name of the histogram.
+        :type name: `str`
+        :param value: The value to record.
+        :type value: `int`
+        :param bin_width: The bin width used if the histogram is created, see :class:`Histogram`.
+        :type bin_width: `int`, optional
+        """
+        if (histogram := self._histograms.get(name)) is None:
+            histogram = self._histograms[name] = Histogram(bin_width=bin_width)
+        histogram.add(value)
+
+    def add_time(self, name: str, start: int) -> int:
+        """Record the time elapsed since start in microseconds to a histogram.
+
+        :param name: The name of the histogram.
+        :type name: `str`
+        :param start: The start time from :func:`time.monotonic_ns`.
+        :type start: `int`
+        :return: The elapsed time in nanoseconds.
+        """
+        elapsed = time.monotonic_ns() - start
+        self.add(name, elapsed // 1000)
+        return elapsed
+
+    def reset(self) -> None:
+        """Remove all recorded histograms."""
+        self._histograms.clear()
+
+    def dump(self) -> None:
+        """Print all histograms, such as over the serial console."""
+        for name in sorted(self._histograms):
+            print(f"{name}: {self._histograms[name]}")
@@ -0,0 +1,107 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Cooper Dalrymple
+#
+# SPDX-License-Identifier: MIT
+"""
+`pio_i2s.sync`
+================================================================================
+
+Synchronization of the clocks of two I2S buses.
+
+* Author(s): Cooper Dalrymple
+"""
+
+from __future__ import annotations
+
+# Only imported by type checkers, annotations are not evaluated at runtime
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from pio_i2s import I2S
+
+
+class ClockSync:
+    """Keep an output bus running at the same rate as an input bus which is clocked by an external
+    device. The two clocks will otherwise drift apart and the output will eventually under- or
+    overrun the input. The rate of the source is measured against the local clock (see
+    :attr:`~pio_i2s.I2S.measured_sample_rate`) and used to set the frequency of the sink. Because
+    the measurement has limited accuracy and the state machine clock divider cannot match the source
+    exactly, the difference in the position of each bus (see :attr:`~pio_i2s.I2S.frame_count` and
+    :attr:`~pio_i2s.I2S.frame_phase`) is also tracked and corrected over time. The sink frequency
+    then alternates between the nearest available values so that the error remains bounded rather
+    than accumulating.
+
+    :meth:`update` must be called regularly, typically once per buffer within the main loop.
+
+    :param source: The input bus in peripheral mode which determines the rate.
+    :type source: :class:`~pio_i2s.I2S`
+    :param sink: The output bus in controller mode which will follow the rate of source.
+    :type sink: :class:`~pio_i2s.I2S`
+    :param response: The time in seconds over which an accumulated frame error is corrected.
+        Shorter times keep the error smaller but react more strongly to measurement jitter.
+    :type response: `float`, optional
+    :param max_correction: The maximum relative rate correction that will be applied to the sink.
+        Larger measured errors are treated as a problem with the source and are limited.
+    :type max_correction: `float`, optional
+    """
+
+    def __init__(
+        self,
+        source: I2S,
+        sink: I2S,
+        response: float = 10.0,
+        max_correction: float = 0.01,
+    ):
+        if not source.peripheral:
+            raise ValueError("Source must be in peripheral mode")
+        if sink.peripheral:
+            raise ValueError("Sink must not be in peripheral mode")
+        if response <= 0:
+            raise ValueError("Response must be greater than 0")
+        self._source = source
+        self._sink = sink
+        self._response = response
+        self._max_correction = max_correction
+        self._offset = None
+        self._error = 0
+        self._frequency = None
+
+    @property
+    def ratio(self) -> float:
+        """The ratio between the actual frequency of the sink and its nominal frequency. This
+        property is read-only.
+        """
+        return self._sink.frequency / self._sink.nominal_frequency
+
+    @property
+    def error(self) -> float:
+        """The number of frames that the sink has fallen behind the source since the first call to
+        :meth:`update` after both buses started transferring. Negative values mean that the sink
+        is ahead. This property is read-only.
+        """
+        return self._error
+
+    def update(self) -> bool:
+        """Update the frame error between the source and sink and set the sink frequency to match
+        the measured rate of the source plus a correction for the error.
+
+        :return: Whether or not the sink frequency was changed.
+        """
+        if not self._source.frame_count or not self._sink.frame_count:
+            return False
+        # Whole buffers are compared as integers to keep precision as the counts grow large
+        difference = self._source.frame_count - self._sink.frame_count
+        difference += self._source.frame_phase - self._sink.frame_phase
+        if self._offset is None:
+            self._offset = difference
+        self._error = difference - self._offset
+
+        rate = self._source.measured_sample_rate + self._error / self._response
+        ratio = min(
+            max(rate / self._sink.sample_rate, 1.0 - self._max_correction),
+            1.0 + self._max_correction,
+        )
+        frequency = round(self._sink.nominal_frequency * ratio)
+        if frequency == self._frequency:
+            return False
+        self._frequency = frequency
+        self._sink.frequency = frequency
+        return True